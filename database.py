@@ -5,7 +5,10 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
+import bson
+from bson import ObjectId
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
@@ -43,6 +46,48 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     result = db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
+def create_documents(collection_name: str, items: list):
+    """Insert several documents with timestamps in one round-trip.
+
+    Returns one entry per item, in order: the inserted id as a string, or the
+    exception that kept that item from being stored.
+    """
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    results = []
+    docs = []  # (position in items, document) for every item that encodes
+    for i, data in enumerate(items):
+        data_dict = data.model_dump() if isinstance(data, BaseModel) else data.copy()
+        data_dict.setdefault('_id', ObjectId())
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        # Encode up front so a document BSON can't represent fails on its own
+        # instead of aborting insert_many partway through the batch
+        try:
+            bson.encode(data_dict)
+        except Exception as e:
+            results.append(e)
+            continue
+        results.append(str(data_dict['_id']))
+        docs.append((i, data_dict))
+
+    if not docs:
+        return results
+
+    try:
+        db[collection_name].insert_many([doc for _, doc in docs], ordered=False)
+    except BulkWriteError as e:
+        for err in e.details.get('writeErrors', []):
+            results[docs[err['index']][0]] = Exception(err.get('errmsg', 'Write failed'))
+    except Exception as e:
+        # Connection and server errors fail the whole batch at once; retrying
+        # per document would hold up every queued order behind more timeouts
+        for i, _ in docs:
+            results[i] = Exception(str(e))
+    return results
+
 def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
     if db is None:
@@ -1,53 +1,302 @@
+import asyncio
+import email.message
+import hashlib
 import os
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional
-
-app = FastAPI(title="BloomBox API", version="1.2.0")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+import msgspec
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from typing import Annotated, List, Optional, get_args, get_type_hints
+
+@asynccontextmanager
+async def _lifespan(app):
+    yield
+    await _stop_order_writer()
+
+
+app = FastAPI(
+    title="BloomBox API",
+    version="1.2.0",
+    default_response_class=ORJSONResponse,
+    lifespan=_lifespan,
 )
 
+# CORS policy is fully static (any origin, credentials, any method/header), so its
+# headers are built once here with the same rules CORSMiddleware applies to this config.
+_CORS_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+_CORS_SIMPLE_HEADERS = (
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-credentials", b"true"),
+)
+_CORS_PREFLIGHT_HEADERS = (
+    (b"vary", b"Origin"),
+    (b"access-control-allow-methods", ", ".join(_CORS_METHODS).encode()),
+    (b"access-control-max-age", b"600"),
+    (b"access-control-allow-credentials", b"true"),
+)
+_CORS_PREFLIGHT_OK = (b"OK", b"text/plain; charset=utf-8")
+_CORS_PREFLIGHT_BAD_METHOD = (b"Disallowed CORS method", b"text/plain; charset=utf-8")
+
+
+class StaticCORSMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        origin = headers.get(b"origin")
+        if origin is None:
+            return await self.app(scope, receive, send)
+
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in headers:
+            await self._preflight(headers, origin, send)
+            return
+
+        # Credentialed requests with cookies can't use "*", so the origin is echoed
+        has_cookie = b"cookie" in headers
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                response_headers = [
+                    (k, v) for k, v in message.get("headers", ())
+                    if k.lower() not in (b"access-control-allow-origin", b"access-control-allow-credentials")
+                ]
+                response_headers.extend(_CORS_SIMPLE_HEADERS)
+                if has_cookie:
+                    response_headers = _allow_explicit_origin(response_headers, origin)
+                message["headers"] = response_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(self, headers, origin, send):
+        method = headers[b"access-control-request-method"].decode("latin-1")
+        status, (body, content_type) = (
+            (200, _CORS_PREFLIGHT_OK) if method in _CORS_METHODS else (400, _CORS_PREFLIGHT_BAD_METHOD)
+        )
+        response_headers = [*_CORS_PREFLIGHT_HEADERS, (b"access-control-allow-origin", origin)]
+        requested = headers.get(b"access-control-request-headers")
+        if requested is not None:
+            response_headers.append((b"access-control-allow-headers", requested))
+        response_headers += [
+            (b"content-length", str(len(body)).encode()),
+            (b"content-type", content_type),
+        ]
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _allow_explicit_origin(headers, origin):
+    headers = [(k, origin if k == b"access-control-allow-origin" else v) for k, v in headers]
+    for i, (k, v) in enumerate(headers):
+        if k.lower() == b"vary":
+            headers[i] = (k, v + b", Origin")
+            return headers
+    headers.append((b"vary", b"Origin"))
+    return headers
+
+
+app.add_middleware(StaticCORSMiddleware)
+
+
+# msgspec only exposes error details as human-readable text, so FastAPI-style
+# locations are parsed out of it. The format isn't a stable msgspec API: the
+# requirement is capped and test_request_bodies.py pins the parsed shapes.
+_MSGSPEC_ERROR_PATH = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+_MSGSPEC_MISSING = re.compile(r"^Object missing required field `(.+)`$")
+_MSGSPEC_BYTE = re.compile(r"\(byte (\d+)\)")
+
+_BODY_MISSING = [{"type": "missing", "loc": ["body"], "msg": "Field required"}]
+_BODY_NOT_OBJECT = [
+    {
+        "type": "model_attributes_type",
+        "loc": ["body"],
+        "msg": "Input should be a valid dictionary or object to extract fields from",
+    }
+]
+
+# String spellings pydantic accepts for bool fields
+_PYDANTIC_BOOL_STRINGS = {
+    "0": False, "off": False, "f": False, "false": False, "n": False, "no": False,
+    "1": True, "on": True, "t": True, "true": True, "y": True, "yes": True,
+}
+
+
+def _msgspec_errors(e):
+    """Translate a msgspec decode error into FastAPI's validation error list."""
+    if not isinstance(e, msgspec.ValidationError):
+        pos = _MSGSPEC_BYTE.search(str(e))
+        loc = ["body", int(pos.group(1))] if pos else ["body"]
+        return [{"type": "json_invalid", "loc": loc, "msg": "JSON decode error", "ctx": {"error": str(e)}}]
+
+    msg, _, path = str(e).partition(" - at `$")
+    loc = ["body"]
+    for key, index in _MSGSPEC_ERROR_PATH.findall(path.rstrip("`")):
+        loc.append(int(index) if index else key)
+    missing = _MSGSPEC_MISSING.match(msg)
+    if missing:
+        return [{"type": "missing", "loc": loc + [missing.group(1)], "msg": "Field required"}]
+    return [{"type": "type_error" if msg.startswith("Expected ") else "value_error", "loc": loc, "msg": msg}]
+
+
+def _is_json_content_type(value):
+    # Same rule FastAPI applies to pydantic bodies: application/json or application/*+json
+    message = email.message.Message()
+    message["content-type"] = value
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+@lru_cache(maxsize=None)
+def _lax_fields(model):
+    """Names of a Struct's int and bool fields, for pydantic-style coercion."""
+    ints, bools = set(), set()
+    for name, tp in get_type_hints(model).items():
+        kinds = get_args(tp) or (tp,)
+        if int in kinds:
+            ints.add(name)
+        elif bool in kinds:
+            bools.add(name)
+    return frozenset(ints), frozenset(bools)
+
+
+def _pydantic_lax(model, obj):
+    """Apply the int/bool coercions pydantic allows but msgspec's lax mode doesn't."""
+    if not isinstance(obj, dict):
+        return obj
+    ints, bools = _lax_fields(model)
+    obj = dict(obj)
+    for name in ints & obj.keys():
+        v = obj[name]
+        if isinstance(v, bool):
+            obj[name] = int(v)
+        elif isinstance(v, str):
+            try:
+                obj[name] = int(v)
+            except ValueError:
+                pass
+    for name in bools & obj.keys():
+        v = obj[name]
+        if isinstance(v, str) and v.lower() in _PYDANTIC_BOOL_STRINGS:
+            obj[name] = _PYDANTIC_BOOL_STRINGS[v.lower()]
+        elif isinstance(v, float) and v in (0.0, 1.0):
+            obj[name] = bool(v)
+    return obj
+
+
+def _msgspec_body(model):
+    """Dependency that decodes and validates the raw JSON body into a msgspec Struct."""
+
+    async def decode(request: Request):
+        body = await request.body()
+        if not body:
+            raise RequestValidationError(_BODY_MISSING)
+        content_type = request.headers.get("content-type")
+        if content_type and not _is_json_content_type(content_type):
+            raise RequestValidationError(_BODY_NOT_OBJECT)
+        try:
+            return msgspec.json.decode(body, type=model, strict=False)
+        except msgspec.ValidationError as e:
+            error = e
+        except msgspec.DecodeError as e:
+            raise RequestValidationError(_msgspec_errors(e))
+        # Only bodies msgspec rejected pay for the slower pydantic-compatible retry
+        try:
+            return msgspec.convert(_pydantic_lax(model, msgspec.json.decode(body)), type=model, strict=False)
+        except msgspec.ValidationError:
+            raise RequestValidationError(_msgspec_errors(error))
+
+    return Depends(decode)
+
+
+# msgspec Structs used as request bodies; their JSON schemas are merged into OpenAPI
+_MSGSPEC_MODELS = []
+
+
+def _msgspec_openapi(model):
+    """openapi_extra documenting a msgspec Struct as the route's request body."""
+    _MSGSPEC_MODELS.append(model)
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": {"$ref": f"#/components/schemas/{model.__name__}"}}},
+        },
+        "responses": {
+            "422": {
+                "description": "Validation Error",
+                "content": {"application/json": {"schema": {"$ref": "#/components/schemas/HTTPValidationError"}}},
+            }
+        },
+    }
 
-class RecommendRequest(BaseModel):
-    query: Optional[str] = Field(None, description="Free-form search like 'gift for book lover'")
-    mood: Optional[str] = Field(None, description="Mood like happy, calm, romantic, stress, self-love")
+
+class RecommendRequest(msgspec.Struct):
+    query: Annotated[Optional[str], msgspec.Meta(description="Free-form search like 'gift for book lover'")] = None
+    mood: Annotated[Optional[str], msgspec.Meta(description="Mood like happy, calm, romantic, stress, self-love")] = None
     relationship: Optional[str] = None
     occasion: Optional[str] = None
     min_budget: Optional[int] = None
     max_budget: Optional[int] = None
 
 
-class MessageRequest(BaseModel):
+class MessageRequest(msgspec.Struct):
     to: Optional[str] = None
     from_name: Optional[str] = None
     mood: Optional[str] = None
     occasion: Optional[str] = None
-    style: Optional[str] = Field(
-        default="warm",
-        description="warm | romantic | playful | grateful | poetic",
-    )
+    style: Annotated[
+        Optional[str],
+        msgspec.Meta(description="warm | romantic | playful | grateful | poetic"),
+    ] = "warm"
+
+
+# Static bodies are serialized once at import instead of on every request
+_ROOT_BYTES = orjson.dumps({"message": "BloomBox API is running"})
+_HELLO_BYTES = orjson.dumps({"message": "Hello from BloomBox backend!"})
 
 
 @app.get("/")
-def read_root():
-    return {"message": "BloomBox API is running"}
+async def read_root():
+    return Response(_ROOT_BYTES, media_type="application/json")
 
 
 @app.get("/api/hello")
-def hello():
-    return {"message": "Hello from BloomBox backend!"}
+async def hello():
+    return Response(_HELLO_BYTES, media_type="application/json")
+
+
+# Health-check pollers hit /test frequently; reuse a healthy result for a few seconds
+_TEST_DB_TTL = 5.0
+_test_db_cache = None  # (monotonic timestamp, response dict)
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     """Test endpoint to check if database is available and accessible"""
+    cached = _test_db_cache
+    if cached is not None and time.monotonic() - cached[0] < _TEST_DB_TTL:
+        return cached[1]
+    return await run_in_threadpool(_check_database)
+
+
+def _check_database():
+    global _test_db_cache
+    healthy = False
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -69,6 +318,7 @@ def test_database():
                 collections = db.list_collection_names()
                 response["collections"] = collections[:10]
                 response["database"] = "✅ Connected & Working"
+                healthy = True
             except Exception as e:
                 response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
         else:
@@ -84,6 +334,8 @@ def test_database():
     response["database_url"] = "✅ Set" if _os.getenv("DATABASE_URL") else "❌ Not Set"
     response["database_name"] = "✅ Set" if _os.getenv("DATABASE_NAME") else "❌ Not Set"
 
+    if healthy:
+        _test_db_cache = (time.monotonic(), response)
     return response
 
 
@@ -146,168 +398,353 @@ FEATURED_BOXES = [
 ]
 
 
+CATEGORIES = {
+    "moods": ["happy", "calm", "romantic", "festive", "sad", "self-love"],
+    "relationships": ["for him", "for her", "parents", "friends"],
+    "occasions": ["birthday", "anniversary", "graduation", "self-love"],
+}
+
+# Lowercase lookup for known enum-ish request values, so normalizing them is a
+# hash hit instead of a fresh str.lower() allocation
+_LOWER = {}
+
+
+def _add_lower(values):
+    for v in values:
+        for variant in (v, v.upper(), v.capitalize(), v.title()):
+            _LOWER[variant] = v
+
+
+def _lower(s):
+    return _LOWER.get(s) or (s or "").lower()
+
+
+_add_lower(("moods", "occasions", "relationships"))
+for _values in CATEGORIES.values():
+    _add_lower(_values)
+
+_FEATURED_BYTES = orjson.dumps({"boxes": FEATURED_BOXES})
+_CATEGORIES_BYTES = orjson.dumps(CATEGORIES)
+_CATEGORIES_ETAG = '"' + hashlib.blake2b(_CATEGORIES_BYTES, digest_size=8).hexdigest() + '"'
+_CATEGORIES_HEADERS = {"ETag": _CATEGORIES_ETAG, "Cache-Control": "public, max-age=300"}
+
+
 @app.get("/api/featured-boxes")
-def get_featured_boxes():
-    return {"boxes": FEATURED_BOXES}
+async def get_featured_boxes():
+    return Response(_FEATURED_BYTES, media_type="application/json")
+
+
+def _etag_matches(if_none_match, etag):
+    if if_none_match == etag or if_none_match == "*":
+        return True
+    # If-None-Match uses weak comparison and may carry a list of tags
+    return any(t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
 
 
 @app.get("/api/categories")
-def get_categories():
-    return {
-        "moods": ["happy", "calm", "romantic", "festive", "sad", "self-love"],
-        "relationships": ["for him", "for her", "parents", "friends"],
-        "occasions": ["birthday", "anniversary", "graduation", "self-love"],
-    }
+async def get_categories(request: Request):
+    inm = request.headers.get("if-none-match")
+    if inm is not None and _etag_matches(inm, _CATEGORIES_ETAG):
+        return Response(status_code=304, headers=_CATEGORIES_HEADERS)
+    return Response(_CATEGORIES_BYTES, headers=_CATEGORIES_HEADERS, media_type="application/json")
+
+
+# Inverted indexes: lowercased category key -> matching boxes, in catalog order
+_BY_MOOD = defaultdict(list)
+_BY_OCCASION = defaultdict(list)
+_BY_RELATIONSHIP = defaultdict(list)
+
+for _b in FEATURED_BOXES:
+    if _b.get("mood"):
+        _BY_MOOD[_b["mood"].lower()].append(_b)
+    # Sets so a box tagged twice (e.g. differing only in case) is listed once
+    for _o in {o.lower() for o in _b.get("occasions", [])}:
+        _BY_OCCASION[_o].append(_b)
+    for _r in {r.lower() for r in _b.get("relationships", [])}:
+        _BY_RELATIONSHIP[_r].append(_b)
+
+_VALID_CTYPES = frozenset(("moods", "occasions", "relationships"))
+
+_CATEGORY_INDEXES = {
+    "moods": dict(_BY_MOOD),
+    "occasions": dict(_BY_OCCASION),
+    "relationships": dict(_BY_RELATIONSHIP),
+}
 
 
 @app.get("/api/category/{ctype}/{key}")
-def get_category_listing(ctype: str, key: str):
+async def get_category_listing(ctype: str, key: str):
     """Return boxes for a given category type and key.
     ctype: moods | occasions | relationships
     """
-    ctype = ctype.lower()
-    key = key.lower()
-    if ctype not in {"moods", "occasions", "relationships"}:
+    ctype = _lower(ctype)
+    key = _lower(key)
+    if ctype not in _VALID_CTYPES:
         raise HTTPException(status_code=400, detail="Invalid category type")
 
-    def matches(b):
-        if ctype == "moods":
-            return (b.get("mood") or "").lower() == key
-        if ctype == "occasions":
-            return key in [o.lower() for o in b.get("occasions", [])]
-        if ctype == "relationships":
-            return key in [r.lower() for r in b.get("relationships", [])]
-        return False
-
-    results = [b for b in FEATURED_BOXES if matches(b)]
+    results = _CATEGORY_INDEXES[ctype].get(key, [])
     return {"category": {"type": ctype, "key": key}, "results": results}
 
 
-@app.get("/api/box/{slug}")
-def get_box(slug: str):
-    for b in FEATURED_BOXES:
-        if b["slug"] == slug:
-            # Add more imagery and details for product page
-            return {
-                **b,
-                "gallery": [
-                    b["thumb"],
-                    "https://images.unsplash.com/photo-1519681393784-d120267933ba?q=80&w=1200&auto=format&fit=crop",
-                    "https://images.unsplash.com/photo-1519682577862-22b62b24e493?q=80&w=1200&auto=format&fit=crop",
-                ],
-                "ribbonOptions": ["Blush Pink", "Sage Green", "Champagne"],
-                "estimated_delivery": "3–5 days",
-                "rating": 4.9,
-                "reviews": 128,
-            }
-    raise HTTPException(status_code=404, detail="Box not found")
-
-
-@app.post("/api/recommend-gifts")
-def recommend_gifts(req: RecommendRequest):
-    """Simple rule-based recommender that mimics AI output."""
-    mood = (req.mood or "").lower()
-    occasion = (req.occasion or "").lower()
-    relationship = (req.relationship or "").lower()
-
-    pool = {
-        "happy": [
-            {"title": "Sunshine Candle", "price": 699, "tag": "cheer"},
-            {"title": "Berry Truffles", "price": 499, "tag": "treat"},
-            {"title": "Mini Bouquet", "price": 799, "tag": "flowers"},
-        ],
-        "calm": [
-            {"title": "Lavender Mist", "price": 749, "tag": "relax"},
-            {"title": "Chamomile Tea Set", "price": 549, "tag": "soothe"},
-            {"title": "Soft Eye Mask", "price": 399, "tag": "sleep"},
-        ],
-        "romantic": [
-            {"title": "Rose Oil", "price": 999, "tag": "romance"},
-            {"title": "Silk Ribbon Wrap", "price": 299, "tag": "wrap"},
-            {"title": "Love Notes Set", "price": 399, "tag": "note"},
-        ],
-        "festive": [
-            {"title": "Confetti Popper", "price": 299, "tag": "party"},
-            {"title": "Vanilla Cupcake Mix", "price": 499, "tag": "bake"},
-            {"title": "Sparkle Topper", "price": 349, "tag": "sparkle"},
-        ],
-        "sad": [
-            {"title": "Warm Hug Mug", "price": 599, "tag": "comfort"},
-            {"title": "Kind Notes", "price": 349, "tag": "uplift"},
-            {"title": "Self-care Mask", "price": 299, "tag": "care"},
-        ],
-        "self-love": [
-            {"title": "Jade Roller", "price": 899, "tag": "glow"},
-            {"title": "Affirmation Cards", "price": 499, "tag": "affirm"},
-            {"title": "Bath Salt", "price": 399, "tag": "soak"},
+def _box_detail(b):
+    # Add more imagery and details for product page
+    return {
+        **b,
+        "gallery": [
+            b["thumb"],
+            "https://images.unsplash.com/photo-1519681393784-d120267933ba?q=80&w=1200&auto=format&fit=crop",
+            "https://images.unsplash.com/photo-1519682577862-22b62b24e493?q=80&w=1200&auto=format&fit=crop",
         ],
+        "ribbonOptions": ["Blush Pink", "Sage Green", "Champagne"],
+        "estimated_delivery": "3–5 days",
+        "rating": 4.9,
+        "reviews": 128,
     }
 
-    suggestions = pool.get(mood or "happy", [])
 
-    # Filter by budget
-    if req.min_budget is not None or req.max_budget is not None:
-        mn = req.min_budget or 0
-        mx = req.max_budget or 10_000_000
-        suggestions = [s for s in suggestions if mn <= s["price"] <= mx]
+_BOX_BY_SLUG = {b["slug"]: b for b in FEATURED_BOXES}
+_BOX_JSON = {slug: orjson.dumps(_box_detail(b)) for slug, b in _BOX_BY_SLUG.items()}
+
+
+@app.get("/api/box/{slug}")
+async def get_box(slug: str):
+    body = _BOX_JSON.get(slug)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Box not found")
+    return Response(body, media_type="application/json")
+
+
+_POOL = {
+    "happy": (
+        {"title": "Sunshine Candle", "price": 699, "tag": "cheer"},
+        {"title": "Berry Truffles", "price": 499, "tag": "treat"},
+        {"title": "Mini Bouquet", "price": 799, "tag": "flowers"},
+    ),
+    "calm": (
+        {"title": "Lavender Mist", "price": 749, "tag": "relax"},
+        {"title": "Chamomile Tea Set", "price": 549, "tag": "soothe"},
+        {"title": "Soft Eye Mask", "price": 399, "tag": "sleep"},
+    ),
+    "romantic": (
+        {"title": "Rose Oil", "price": 999, "tag": "romance"},
+        {"title": "Silk Ribbon Wrap", "price": 299, "tag": "wrap"},
+        {"title": "Love Notes Set", "price": 399, "tag": "note"},
+    ),
+    "festive": (
+        {"title": "Confetti Popper", "price": 299, "tag": "party"},
+        {"title": "Vanilla Cupcake Mix", "price": 499, "tag": "bake"},
+        {"title": "Sparkle Topper", "price": 349, "tag": "sparkle"},
+    ),
+    "sad": (
+        {"title": "Warm Hug Mug", "price": 599, "tag": "comfort"},
+        {"title": "Kind Notes", "price": 349, "tag": "uplift"},
+        {"title": "Self-care Mask", "price": 299, "tag": "care"},
+    ),
+    "self-love": (
+        {"title": "Jade Roller", "price": 899, "tag": "glow"},
+        {"title": "Affirmation Cards", "price": 499, "tag": "affirm"},
+        {"title": "Bath Salt", "price": 399, "tag": "soak"},
+    ),
+}
+
+# Price-sorted pools with parallel price lists so budget filters are a bisect + slice
+_POOL_SORTED = {mood: tuple(sorted(items, key=lambda s: s["price"])) for mood, items in _POOL.items()}
+_PRICES = {mood: [s["price"] for s in items] for mood, items in _POOL_SORTED.items()}
+
+
+@lru_cache(maxsize=1024)
+def _suggestions(pool_key, min_budget, max_budget):
+    # Keyed only on the mood pool and budgets; free-text fields never enter the cache
+    if min_budget is not None or max_budget is not None:
+        mn = min_budget or 0
+        mx = max_budget or 10_000_000
+        prices = _PRICES[pool_key]
+        lo = bisect_left(prices, mn)
+        hi = bisect_right(prices, mx)
+        return _POOL_SORTED[pool_key][lo:hi][:5]
+    return _POOL[pool_key][:5]
+
+
+@app.post("/api/recommend-gifts", openapi_extra=_msgspec_openapi(RecommendRequest))
+async def recommend_gifts(req: RecommendRequest = _msgspec_body(RecommendRequest)):
+    """Simple rule-based recommender that mimics AI output."""
+    mood = _lower(req.mood)
+    occasion = _lower(req.occasion)
+    relationship = _lower(req.relationship)
+
+    pool_key = mood or "happy"
+    suggestions = _suggestions(pool_key, req.min_budget, req.max_budget) if pool_key in _POOL else ()
 
     # Personalize blurb
     context_bits = [b for b in [mood, occasion, relationship] if b]
     context = ", ".join(context_bits) if context_bits else "thoughtful"
 
-    return {
+    body = orjson.dumps({
         "context": context,
         "query": req.query,
-        "results": suggestions[:5],
-    }
+        "results": suggestions,
+    })
+    return Response(body, media_type="application/json")
 
 
-@app.post("/api/generate-message")
-def generate_message(req: MessageRequest):
-    tones = {
-        "warm": "Wrapping you in a soft hug and a little sparkle today.",
-        "romantic": "My heart chose this just for you—gentle, rosy and full of love.",
-        "playful": "A pocketful of confetti and a sprinkle of mischief—just for you!",
-        "grateful": "Thank you for being the calm in my chaos and the glow in my days.",
-        "poetic": "Like petals on quiet water, may this bring you small, luminous joy.",
-    }
+_TONES = {
+    "warm": "Wrapping you in a soft hug and a little sparkle today.",
+    "romantic": "My heart chose this just for you—gentle, rosy and full of love.",
+    "playful": "A pocketful of confetti and a sprinkle of mischief—just for you!",
+    "grateful": "Thank you for being the calm in my chaos and the glow in my days.",
+    "poetic": "Like petals on quiet water, may this bring you small, luminous joy.",
+}
+
+_add_lower(_TONES)
+
+_DEFAULT_TO = "Hey love,"
+_DEFAULT_FROM = "\n\nWith love,\nBloomBox"
+
+
+def _message(to, from_name, mood, occasion, style):
+    style_line = _TONES.get(_lower(style or "warm"), _TONES["warm"])
 
-    to_line = f"Dear {req.to}," if req.to else "Hey love,"
-    style_line = tones.get((req.style or "warm").lower(), tones["warm"]) 
-    mood_line = f" For your {req.occasion} I wished for {req.mood} moments." if req.occasion or req.mood else ""
-    from_line = f"\n\nWith love,\n{req.from_name}" if req.from_name else "\n\nWith love,\nBloomBox"
+    parts = ["Dear ", to, ",\n", style_line] if to else [_DEFAULT_TO, "\n", style_line]
+    if occasion or mood:
+        parts += [" For your ", str(occasion), " I wished for ", str(mood), " moments."]
+    if from_name:
+        parts += ["\n\nWith love,\n", from_name]
+    else:
+        parts.append(_DEFAULT_FROM)
 
-    message = f"{to_line}\n{style_line}{mood_line}{from_line}"
+    return orjson.dumps({"message": "".join(parts)})
 
-    return {"message": message}
+
+# Bodies for the common request that only picks a style
+_EMPTY_MSG_BYTES = {style: _message(None, None, None, None, style) for style in _TONES}
+
+
+@app.post("/api/generate-message", openapi_extra=_msgspec_openapi(MessageRequest))
+async def generate_message(req: MessageRequest = _msgspec_body(MessageRequest)):
+    if not (req.to or req.from_name or req.occasion or req.mood):
+        body = _EMPTY_MSG_BYTES.get(_lower(req.style or "warm"), _EMPTY_MSG_BYTES["warm"])
+        return Response(body, media_type="application/json")
+    body = _message(req.to, req.from_name, req.mood, req.occasion, req.style)
+    return Response(body, media_type="application/json")
 
 
 # --- Orders & payments (mock payment + email hooks) ---
 from schemas import Order
-from database import create_document
+from database import create_documents
 
 class CreateOrderRequest(Order):
     pass
 
+
+# Per-thread entropy buffer so payment refs don't cost a getrandom() syscall each
+_ENTROPY_SIZE = 4096
+_entropy = threading.local()
+
+
+def _random_hex(nbytes=4):
+    buf = getattr(_entropy, "buf", b"")
+    off = getattr(_entropy, "off", 0)
+    if off + nbytes > len(buf):
+        buf = _entropy.buf = os.urandom(_ENTROPY_SIZE)
+        off = 0
+    _entropy.off = off + nbytes
+    return buf[off:off + nbytes].hex()
+
+
+# Concurrent order inserts are coalesced into one insert_many per short window
+_ORDER_BATCH_MAX = 100
+_ORDER_BATCH_WINDOW = 0.01  # seconds
+_order_queue = None
+_order_writer_task = None
+
+
+async def _order_writer():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _order_queue.get()]
+        deadline = loop.time() + _ORDER_BATCH_WINDOW
+        while len(batch) < _ORDER_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_order_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            results = await run_in_threadpool(create_documents, 'order', [doc for doc, _ in batch])
+        except Exception as e:
+            # Raised before anything was written (e.g. no database configured)
+            results = [Exception(str(e)) for _ in batch]
+
+        for i, (_, fut) in enumerate(batch):
+            if fut.done():
+                continue
+            # Never leave a request waiting if fewer results came back than orders
+            result = results[i] if i < len(results) else RuntimeError("No result for order in batch")
+            if isinstance(result, BaseException):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+        for _ in batch:
+            _order_queue.task_done()
+
+
+async def _enqueue_order(doc):
+    global _order_queue, _order_writer_task
+    if _order_writer_task is None or _order_writer_task.done():
+        _order_queue = asyncio.Queue()
+        _order_writer_task = asyncio.create_task(_order_writer())
+    fut = asyncio.get_running_loop().create_future()
+    await _order_queue.put((doc, fut))
+    return await fut
+
+
+async def _stop_order_writer():
+    # Flush orders still queued, then stop the writer so it isn't left pending
+    task = _order_writer_task
+    if task is None or task.done():
+        return
+    await _order_queue.join()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
 @app.post('/api/orders')
-def create_order(req: CreateOrderRequest):
+async def create_order(req: CreateOrderRequest):
     # In a real system, create payment intent with Razorpay/Stripe and return client secret/order id.
     # Here, we persist the order and return a mock payment reference.
     try:
-        payment_ref = f"PAY-{os.urandom(4).hex()}"
-        order_id = create_document('order', { **req.model_dump(), 'payment_ref': payment_ref, 'status': 'created' })
+        payment_ref = "PAY-" + _random_hex(4)
+        order_id = await _enqueue_order({
+            'email': req.email,
+            'name': req.name,
+            'address': req.address,
+            'city': req.city,
+            'postal_code': req.postal_code,
+            'phone': req.phone,
+            'amount': req.amount,
+            'currency': req.currency,
+            'items': [{ 'id': i.id, 'title': i.title, 'price': i.price, 'qty': i.qty } for i in req.items],
+            'payment_ref': payment_ref,
+            'status': 'created',
+        })
         return { 'order_id': order_id, 'payment_ref': payment_ref, 'amount': req.amount, 'currency': req.currency }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-class ConfirmPaymentRequest(BaseModel):
+class ConfirmPaymentRequest(msgspec.Struct):
     order_id: str
     payment_ref: str
     provider: Optional[str] = 'mock'
     success: bool = True
 
-@app.post('/api/orders/confirm')
-def confirm_payment(req: ConfirmPaymentRequest):
+@app.post('/api/orders/confirm', openapi_extra=_msgspec_openapi(ConfirmPaymentRequest))
+async def confirm_payment(req: ConfirmPaymentRequest = _msgspec_body(ConfirmPaymentRequest)):
     # Here we would verify signature/webhook; we just echo success.
     try:
         # In real usage, update DB document status to 'paid'
@@ -315,18 +752,42 @@ def confirm_payment(req: ConfirmPaymentRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-class EmailRequest(BaseModel):
+class EmailRequest(msgspec.Struct):
     to: str
     subject: str
     html: str
 
-@app.post('/api/send-email')
-def send_email(req: EmailRequest):
+@app.post('/api/send-email', openapi_extra=_msgspec_openapi(EmailRequest))
+async def send_email(req: EmailRequest = _msgspec_body(EmailRequest)):
     # Placeholder: integrate with transactional email (Resend, SendGrid, SES). We just return success.
     return { 'status': 'queued' }
 
 
+_fastapi_openapi = app.openapi
+
+
+def _openapi():
+    if app.openapi_schema is None:
+        schema = _fastapi_openapi()
+        _, components = msgspec.json.schema_components(
+            _MSGSPEC_MODELS, ref_template="#/components/schemas/{name}"
+        )
+        schema.setdefault("components", {}).setdefault("schemas", {}).update(components)
+    return app.openapi_schema
+
+
+app.openapi = _openapi
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+    )
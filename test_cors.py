@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.middleware.cors import CORSMiddleware
+
+from main import StaticCORSMiddleware, app
+
+client = TestClient(app)
+ORIGIN = "https://shop.example"
+
+
+def test_simple_response_allows_any_origin():
+    r = client.get("/api/hello", headers={"Origin": ORIGIN})
+    assert r.status_code == 200
+    assert r.headers["access-control-allow-origin"] == "*"
+    assert r.headers["access-control-allow-credentials"] == "true"
+    assert "vary" not in r.headers
+
+
+def test_error_response_gets_cors_headers():
+    r = client.get("/api/box/missing", headers={"Origin": ORIGIN})
+    assert r.status_code == 404
+    assert r.headers["access-control-allow-origin"] == "*"
+
+
+def test_cookie_request_echoes_origin():
+    r = client.get("/api/hello", headers={"Origin": ORIGIN, "Cookie": "sid=1"})
+    assert r.headers["access-control-allow-origin"] == ORIGIN
+    assert r.headers["vary"] == "Origin"
+
+
+def test_no_origin_means_no_cors_headers():
+    r = client.get("/api/hello")
+    assert "access-control-allow-origin" not in r.headers
+
+
+def test_preflight():
+    r = client.options(
+        "/api/recommend-gifts",
+        headers={
+            "Origin": ORIGIN,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type",
+        },
+    )
+    assert r.status_code == 200
+    assert r.text == "OK"
+    assert r.headers["content-type"].startswith("text/plain")
+    assert r.headers["access-control-allow-origin"] == ORIGIN
+    assert r.headers["access-control-allow-headers"] == "content-type"
+    assert r.headers["access-control-allow-credentials"] == "true"
+
+
+async def _inner(scope, receive, send):
+    await send({"type": "http.response.start", "status": 404, "headers": [(b"vary", b"Accept-Encoding")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _run(middleware, method, headers):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": "/", "headers": headers, "query_string": b""}
+    await middleware(scope, receive, send)
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], sorted((k.lower(), v) for k, v in start["headers"]), body
+
+
+@pytest.mark.parametrize(
+    "method,headers",
+    [
+        ("GET", [(b"origin", ORIGIN.encode())]),
+        ("GET", [(b"origin", ORIGIN.encode()), (b"cookie", b"sid=1")]),
+        ("POST", []),
+        ("OPTIONS", [(b"origin", ORIGIN.encode()), (b"access-control-request-method", b"PUT")]),
+        ("OPTIONS", [(b"origin", ORIGIN.encode()), (b"access-control-request-method", b"TRACE")]),
+        (
+            "OPTIONS",
+            [
+                (b"origin", ORIGIN.encode()),
+                (b"access-control-request-method", b"POST"),
+                (b"access-control-request-headers", b"content-type, x-token"),
+            ],
+        ),
+    ],
+)
+def test_matches_starlette_cors_middleware(method, headers):
+    reference = CORSMiddleware(
+        _inner, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+    )
+    expected = asyncio.run(_run(reference, method, headers))
+    assert asyncio.run(_run(StaticCORSMiddleware(_inner), method, headers)) == expected
@@ -0,0 +1,139 @@
+import asyncio
+
+import bson
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+import database
+import main
+
+
+class FakeCollection:
+    """Stores BSON-encoded docs like pymongo, failing mid-batch on unencodable ones."""
+
+    def __init__(self, bulk_write_errors=()):
+        self.docs = {}
+        self.insert_many_calls = 0
+        self.insert_one_calls = 0
+        self.bulk_write_errors = set(bulk_write_errors)
+
+    def insert_one(self, doc):
+        self.insert_one_calls += 1
+        self._store(doc)
+
+    def _store(self, doc):
+        bson.encode(doc)
+        self.docs[doc["_id"]] = doc
+
+    def insert_many(self, docs, ordered=True):
+        self.insert_many_calls += 1
+        errors = []
+        for i, doc in enumerate(docs):
+            if i in self.bulk_write_errors:
+                errors.append({"index": i, "code": 121, "errmsg": "Document failed validation"})
+                continue
+            self._store(doc)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+class UnreachableCollection:
+    """Every call fails the way pymongo does when no server can be selected."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def insert_many(self, docs, ordered=True):
+        self.calls += 1
+        raise ServerSelectionTimeoutError("localhost:27017: connection refused")
+
+    insert_one = insert_many
+
+
+@pytest.fixture
+def orders(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(database, "db", {"order": collection})
+    return collection
+
+
+def _order(amount=1000):
+    return main.CreateOrderRequest(
+        email="a@example.com",
+        amount=amount,
+        items=[{"id": "joy-box", "title": "Joy Box", "price": 1899}],
+    )
+
+
+async def _create_all(reqs):
+    return await asyncio.gather(*(main.create_order(r) for r in reqs), return_exceptions=True)
+
+
+def test_single_order(orders):
+    resp = asyncio.run(main.create_order(_order()))
+    assert resp["payment_ref"].startswith("PAY-")
+    assert resp["order_id"] in {str(_id) for _id in orders.docs}
+    assert len(orders.docs) == 1
+
+
+def test_concurrent_orders_share_one_insert(orders):
+    results = asyncio.run(_create_all([_order() for _ in range(5)]))
+    assert orders.insert_many_calls == 1
+    assert sorted(r["order_id"] for r in results) == sorted(str(_id) for _id in orders.docs)
+
+
+def test_unencodable_order_fails_alone(orders):
+    results = asyncio.run(_create_all([_order(), _order(), _order(2**70), _order()]))
+    assert [isinstance(r, HTTPException) for r in results] == [False, False, True, False]
+    assert results[2].status_code == 500
+    # The bad order is caught before the write; the rest go out in one insert
+    assert orders.insert_many_calls == 1
+    assert orders.insert_one_calls == 0
+    assert len(orders.docs) == 3
+    assert {r["order_id"] for r in results if isinstance(r, dict)} == {str(_id) for _id in orders.docs}
+
+
+def test_bulk_write_error_fails_only_reported_index(monkeypatch):
+    collection = FakeCollection(bulk_write_errors={1})
+    monkeypatch.setattr(database, "db", {"order": collection})
+    results = asyncio.run(_create_all([_order(), _order(), _order()]))
+    assert [isinstance(r, HTTPException) for r in results] == [False, True, False]
+    assert results[1].detail == "Document failed validation"
+    assert len(collection.docs) == 2
+
+
+def test_no_database_fails_every_order(monkeypatch):
+    monkeypatch.setattr(database, "db", None)
+    results = asyncio.run(_create_all([_order(), _order()]))
+    assert all(isinstance(r, HTTPException) and r.status_code == 500 for r in results)
+
+
+def test_connection_error_fails_batch_in_one_call(monkeypatch):
+    collection = UnreachableCollection()
+    monkeypatch.setattr(database, "db", {"order": collection})
+    results = asyncio.run(_create_all([_order() for _ in range(10)]))
+    assert all(isinstance(r, HTTPException) and r.status_code == 500 for r in results)
+    assert "connection refused" in results[0].detail
+    assert collection.calls == 1
+
+
+def test_shutdown_stops_order_writer(orders):
+    async def run():
+        await main.create_order(_order())
+        task = main._order_writer_task
+        await main._stop_order_writer()
+        return task
+
+    task = asyncio.run(run())
+    assert task.cancelled()
+    assert len(orders.docs) == 1
+
+
+def test_app_shutdown_runs_order_writer_cleanup(orders):
+    with TestClient(main.app) as client:
+        r = client.post("/api/orders", json={"email": "a@example.com", "amount": 1000, "items": []})
+        assert r.status_code == 200
+        task = main._order_writer_task
+    assert task.done()
@@ -0,0 +1,115 @@
+from typing import List
+
+import msgspec
+import pytest
+from fastapi.testclient import TestClient
+
+from main import _msgspec_errors, app
+
+client = TestClient(app)
+
+
+def test_msgspec_bodies_are_documented():
+    schema = client.get("/openapi.json").json()
+    for path, model in [
+        ("/api/recommend-gifts", "RecommendRequest"),
+        ("/api/generate-message", "MessageRequest"),
+        ("/api/orders/confirm", "ConfirmPaymentRequest"),
+        ("/api/send-email", "EmailRequest"),
+    ]:
+        body = schema["paths"][path]["post"]["requestBody"]
+        assert body["content"]["application/json"]["schema"] == {"$ref": f"#/components/schemas/{model}"}
+        assert model in schema["components"]["schemas"]
+
+
+def test_missing_field_uses_fastapi_error_shape():
+    r = client.post("/api/orders/confirm", json={"order_id": "o1"})
+    assert r.status_code == 422
+    assert r.json() == {"detail": [{"type": "missing", "loc": ["body", "payment_ref"], "msg": "Field required"}]}
+
+
+def test_type_error_reports_body_location():
+    r = client.post("/api/recommend-gifts", json={"query": 5})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"] == ["body", "query"]
+
+
+def test_empty_and_malformed_bodies():
+    assert client.post("/api/recommend-gifts", content=b"").json()["detail"][0]["loc"] == ["body"]
+    err = client.post("/api/recommend-gifts", content=b"{bad").json()["detail"][0]
+    assert err["type"] == "json_invalid"
+
+
+def test_budgets_are_documented_as_integers():
+    props = client.get("/openapi.json").json()["components"]["schemas"]["RecommendRequest"]["properties"]
+    assert props["min_budget"]["anyOf"] == [{"type": "integer"}, {"type": "null"}]
+
+
+@pytest.mark.parametrize("value", ["500", " 500 ", "+500", "5_00"])
+def test_budget_strings_parse_like_pydantic(value):
+    r = client.post("/api/recommend-gifts", json={"mood": "calm", "min_budget": value})
+    assert [s["price"] for s in r.json()["results"]] == [549, 749]
+
+
+def test_budget_accepts_json_bool():
+    truthy = client.post("/api/recommend-gifts", json={"mood": "calm", "min_budget": True})
+    assert truthy.status_code == 200
+    assert len(truthy.json()["results"]) == 3
+
+
+@pytest.mark.parametrize("value", ["true", 500.5, "abc"])
+def test_budget_rejects_non_integers(value):
+    r = client.post("/api/recommend-gifts", json={"min_budget": value})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["msg"] == f"Expected `int | null`, got `{type(value).__name__}`"
+
+
+@pytest.mark.parametrize("value,paid", [("yes", True), ("Off", False), (1.0, True), ("t", True)])
+def test_bool_strings_parse_like_pydantic(value, paid):
+    r = client.post("/api/orders/confirm", json={"order_id": "o1", "payment_ref": "p1", "success": value})
+    assert r.json()["status"] == ("paid" if paid else "failed")
+
+
+@pytest.mark.parametrize("value", [" yes ", 2])
+def test_bool_rejects_other_values(value):
+    r = client.post("/api/orders/confirm", json={"order_id": "o1", "payment_ref": "p1", "success": value})
+    assert r.status_code == 422
+
+
+@pytest.mark.parametrize("content_type", ["text/plain", "application/x-www-form-urlencoded"])
+def test_non_json_content_type_is_rejected(content_type):
+    r = client.post("/api/recommend-gifts", content=b'{"mood": "calm"}', headers={"content-type": content_type})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["type"] == "model_attributes_type"
+
+
+@pytest.mark.parametrize("content_type", [None, "application/json; charset=utf-8", "application/vnd.api+json"])
+def test_json_content_types_are_accepted(content_type):
+    headers = {"content-type": content_type} if content_type else {}
+    r = client.post("/api/recommend-gifts", content=b'{"mood": "calm"}', headers=headers)
+    assert r.status_code == 200
+
+
+class _Item(msgspec.Struct):
+    id: str
+
+
+class _Nested(msgspec.Struct):
+    items: List[_Item]
+
+
+@pytest.mark.parametrize(
+    "body,expected",
+    [
+        (b'{"items": [{"id": 1}]}', {"type": "type_error", "loc": ["body", "items", 0, "id"]}),
+        (b'{"items": [{}]}', {"type": "missing", "loc": ["body", "items", 0, "id"]}),
+        (b'{"items": [', {"type": "json_invalid", "loc": ["body"]}),
+        (b'{bad', {"type": "json_invalid", "loc": ["body", 1]}),
+    ],
+)
+def test_msgspec_error_text_still_parses(body, expected):
+    # _msgspec_errors parses msgspec's error messages; this fails if their format changes
+    with pytest.raises(msgspec.DecodeError) as exc:
+        msgspec.json.decode(body, type=_Nested)
+    (error,) = _msgspec_errors(exc.value)
+    assert {k: error[k] for k in expected} == expected